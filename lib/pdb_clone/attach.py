@@ -23,6 +23,7 @@ except ImportError:
 import sys
 import os
 import io
+import re
 import cmd
 import argparse
 import signal
@@ -32,26 +33,45 @@ import socket
 import asyncore
 import asynchat
 import errno
-from itertools import takewhile
 from collections import deque
 from subprocess import Popen, STDOUT, PIPE
 
-from . import PY3, DFLT_ADDRESS, pdb
+from . import PY3, DFLT_ADDRESS
 
-prompts = ('(Pdb) ', '(com) ', '((Pdb)) ', '>>> ', '... ')
-line_prmpts = tuple('\n%s' % p for p in prompts)
+prompts = (b'(Pdb) ', b'(com) ', b'((Pdb)) ', b'>>> ', b'... ')
+line_prmpts = tuple(b'\n' + p for p in prompts)
+_line_prmpts_set = frozenset(line_prmpts)
+_prompt_lengths = sorted(set(len(p) for p in prompts))
+
+def _prompt_length(data):
+    """Return the length of the prompt at the end of data or zero."""
+    if data in prompts:
+        return len(data)
+    if data.endswith(line_prmpts):
+        for plen in _prompt_lengths:
+            if bytes(data[-plen-1:]) in _line_prmpts_set:
+                return plen
+    return 0
 
 class AttachSocket(asynchat.async_chat, cmd.Cmd):
-    """A socket connected to a remote Pdb instance."""
+    """A socket connected to a remote Pdb instance.
+
+    The Pdb 'do_' and 'help_' attributes are added to the class when the first
+    instance is created.
+    """
+
+    _pdb_commands_added = False
 
     def __init__(self, connections, completekey='tab', stdin=None, stdout=None):
+        if not AttachSocket._pdb_commands_added:
+            _add_pdb_commands(AttachSocket)
         asynchat.async_chat.__init__(self, map=connections)
         cmd.Cmd.__init__(self, completekey, stdin, stdout)
         if stdout:
             self.use_rawinput = 0
         self.set_terminator(None)
         self.allow_kbdint = False
-        self.data = b''
+        self.data = bytearray()
         self.remote = ''
         self.pid = 0
         self._previous_sigint_handler = None
@@ -95,43 +115,56 @@ class AttachSocket(asynchat.async_chat, cmd.Cmd):
             self.close()
 
     def collect_incoming_data(self, data):
-        self.data += data
-        while self.data and not self.remote:
-            idx = self.data.find(b'\n')
-            if idx != -1:
-                if idx > 0:
-                    self.get_header(_decode(self.data[:idx], encoding='utf-8'))
-                self.data = self.data[idx + 1:]
-                continue
-            return
+        self.data.extend(data)
+        if not self.remote:
+            # Consume all the complete header lines at once.
+            pos = 0
+            while not self.remote:
+                idx = self.data.find(b'\n', pos)
+                if idx == -1:
+                    break
+                if idx > pos:
+                    self.get_header(_decode(self.data[pos:idx],
+                                                        encoding='utf-8'))
+                pos = idx + 1
+            del self.data[:pos]
+            if not self.remote:
+                return
         if self.data:
             self.interaction()
 
     def connect_retry(self, address, verbose):
-        skip_connect = 5
+        # Back off exponentially from 5 msecs to 200 msecs between connection
+        # attempts and give up after about 4 seconds.
+        delay = 0.005
+        waited = 0
         count = 0
+        dots = False
         while not self.connected:
             try:
                 self.connect(address)
             except IOError as err:
                 if err.errno != errno.ECONNREFUSED:
                     raise
-                # Skip printing the first connection failures.
-                if count >= skip_connect and verbose:
-                    if count == skip_connect:
-                        printflush('Connecting to remote pdb' +
-                                skip_connect * '.', end='')
+                # Skip printing the failures of the first second.
+                if waited >= 1 and verbose:
+                    if not dots:
+                        dots = True
+                        printflush('Connecting to remote pdb' + 5 * '.',
+                                   end='')
                     else:
                         printflush('.', end='')
                 count += 1
-                if count >= 20:
+                if waited >= 4:
                     if verbose:
                         printflush('failed')
                     self.close()
                     raise
                 yield count
-                time.sleep(0.200)
-        if verbose and count > skip_connect:
+                time.sleep(delay)
+                waited += delay
+                delay = min(2 * delay, 0.200)
+        if verbose and dots:
             printflush('ok')
 
     def get_header(self, line):
@@ -150,15 +183,10 @@ class AttachSocket(asynchat.async_chat, cmd.Cmd):
             self.message('Invalid header line: %s' % line)
 
     def interaction(self):
-        content = _decode(self.data, encoding='utf-8')
-        plen = 0
-        if content.endswith(line_prmpts) or content in prompts:
-            for i in range(len(prompts)):
-                if content.endswith(line_prmpts[i]) or content == prompts[i]:
-                    plen = len(prompts[i])
-                    break
+        plen = _prompt_length(self.data)
         if plen:
-            self.data = b''
+            content = _decode(self.data, encoding='utf-8')
+            del self.data[:]
             self.message(content[:-plen], end='')
             self.prompt = content[-plen:]
             while True:
@@ -186,16 +214,25 @@ class AttachSocket(asynchat.async_chat, cmd.Cmd):
         self.push(_encode(self.curline, encoding='utf-8'))
         return True
 
+def _remote_command(name, cmd):
+    def method(self, line):
+        return self.default(line, cmd=cmd)
+    method.__name__ = name
+    return method
+
+def _add_pdb_commands(cls):
     # Add the Pdb 'do_' and 'help_' methods as commands controlled by the
     # cmd.Cmd completion machinery. They all call the default method, as well
     # as any unrecognized command.
+    # The pdb module is imported here, on the first instantiation of an
+    # AttachSocket, instead of when the attach module is imported.
+    from . import pdb
     for name in dir(pdb.Pdb):
         if name.startswith('do_'):
-            exec('def %s(self, l): return self.default(l, cmd="%s")'
-                                                    % (name, name[3:]))
+            setattr(cls, name, _remote_command(name, name[3:]))
         elif name.startswith('help_'):
-            exec('def %s(self, l): return self.default(l, cmd="help %s")'
-                                                    % (name, name[5:]))
+            setattr(cls, name, _remote_command(name, 'help %s' % name[5:]))
+    cls._pdb_commands_added = True
 
 class AttachSocketWithDetach(AttachSocket):
     """A socket connected to a remote Pdb instance.
@@ -204,9 +241,8 @@ class AttachSocketWithDetach(AttachSocket):
     """
 
     def interaction(self):
-        content = _decode(self.data, encoding='utf-8')
-        if content.endswith(line_prmpts) or content in prompts:
-            self.data = b''
+        if _prompt_length(self.data):
+            del self.data[:]
             self.push(_encode('detach\n', encoding='utf-8'))
 
 class Result:
@@ -235,6 +271,7 @@ class StatementLine:
         self.line = ''
         self.skipping = False
         self.lines = deque()
+        self.lines_set = set()
 
     def set_line(self, line):
         self.line = line
@@ -245,7 +282,7 @@ class StatementLine:
         line = self.line
         self.line = ''
         # 'line' is the statement line of the previous py-pdb command.
-        if line in self.lines:
+        if line in self.lines_set:
             if not self.skipping:
                 self.skipping = True
                 printflush('Skipping lines', end='')
@@ -253,13 +290,14 @@ class StatementLine:
             return True
         elif line:
             self.lines.append(line)
+            self.lines_set.add(line)
             if len(self.lines) > 30:
-                self.lines.popleft()
+                self.lines_set.discard(self.lines.popleft())
 
         return False
 
     def print(self):
-        if self.line and self.line not in self.lines:
+        if self.line and self.line not in self.lines_set:
             if self.skipping:
                 self.skipping = False
                 print('')
@@ -289,19 +327,13 @@ class GdbSocket(asynchat.async_chat):
         self.state = self.ST_INIT
         self.gdb_version = None
         self.set_terminator(b'\n')
-        self.ibuff = io.StringIO() if PY3 else StringIO.StringIO()
+        self.ibuff = bytearray()
 
         # Setup gdb to not stop the inferior on the following signals.
-        self.cli_command('handle SIGPIPE noprint')
-        self.cli_command('handle SIGUSR1 noprint')
-        self.cli_command('handle SIGUSR2 noprint')
-        self.cli_command('handle SIGALRM noprint')
-        self.cli_command('handle SIGCHLD noprint')
-        self.cli_command('handle SIGABRT noprint')
-        self.cli_command('handle SIGKILL noprint')
-        self.cli_command('handle SIGTERM noprint')
-        self.cli_command('handle SIGXFSZ noprint')
-        self.cli_command('handle SIGINT noprint')
+        self.cli_command(*('handle %s noprint' % sig for sig in
+                            ('SIGPIPE', 'SIGUSR1', 'SIGUSR2', 'SIGALRM',
+                             'SIGCHLD', 'SIGABRT', 'SIGKILL', 'SIGTERM',
+                             'SIGXFSZ', 'SIGINT')))
 
     def handle_error(self):
         self.close()
@@ -322,15 +354,20 @@ class GdbSocket(asynchat.async_chat):
                 printflush('Gdb terminated, got signal %s.'
                                         % signals.get(-rc, -rc))
 
-    def mi_command(self, line):
-        if not line.endswith('\n'):
-            line += '\n'
-        if self.verbose:
-            printflush('+++', line, end='')
-        self.push(_encode(line))
-
-    def cli_command(self, cmd):
-        self.mi_command('-interpreter-exec console "%s"' % cmd)
+    def mi_command(self, *lines):
+        # Push all the commands at once.
+        data = []
+        for line in lines:
+            if not line.endswith('\n'):
+                line += '\n'
+            if self.verbose:
+                printflush('+++', line, end='')
+            data.append(line)
+        self.push(_encode(''.join(data)))
+
+    def cli_command(self, *cmds):
+        self.mi_command(*('-interpreter-exec console "%s"' % cmd
+                          for cmd in cmds))
 
     def exit(self, msg=None, where=False):
         self.state = self.ST_EXIT
@@ -350,11 +387,11 @@ class GdbSocket(asynchat.async_chat):
         connect_process(asock, self.ctx, self.proc_iut, address=self.address)
 
     def collect_incoming_data(self, data):
-        self.ibuff.write(_decode(data))
+        self.ibuff.extend(data)
 
     def found_terminator(self):
-        line = self.ibuff.getvalue()
-        self.ibuff = io.StringIO() if PY3 else StringIO.StringIO()
+        line = _decode(self.ibuff)
+        del self.ibuff[:]
         if self.verbose:
             printflush(line)
         elif line.startswith('~"->'):
@@ -452,7 +489,7 @@ def _decode(data, encoding=None):
         else:
             return data.decode()
     else:
-        return data
+        return bytes(data)
 
 def _encode(data, encoding=None):
     if PY3:
@@ -463,6 +500,8 @@ def _encode(data, encoding=None):
     else:
         return data
 
+_gdb_version_re = re.compile(r'[0-9.]*')
+
 def parse_gdb_version(line):
     r"""Parse the gdb version from the gdb header.
 
@@ -491,9 +530,8 @@ def parse_gdb_version(line):
             # Strip after first non digit or '.' character. Allow for linux
             # Suse non conformant implementation that encloses the version in
             # brackets.
-            version = ''.join(takewhile(lambda x: x.isdigit() or x == '.',
-                                                    version[1].lstrip('(')))
-            return version.strip('.')
+            version = _gdb_version_re.match(version[1].lstrip('('))
+            return version.group().strip('.')
     return ''
 
 def gdb_terminated(msg):
@@ -512,8 +550,8 @@ def spawn_gdb(pid, address=DFLT_ADDRESS, gdb='gdb', verbose=False,
     connections = {}
     gdb = GdbSocket(ctx, address, proc, proc_iut, parent, verbose,
                     connections)
-    gdb.mi_command('-target-attach %d' % pid)
-    gdb.cli_command('python import pdb_clone.bootstrappdb_gdb')
+    gdb.mi_command('-target-attach %d' % pid,
+        '-interpreter-exec console "python import pdb_clone.bootstrappdb_gdb"')
     asyncore.loop(map=connections)
     proc.wait()
     return gdb.error
@@ -619,8 +619,11 @@ class Bdb(BdbTracer):
 
     def __init__(self, skip=None):
         skip_modules = tuple(skip) if skip else ()
+        # The ModuleFinder methods are invoked by the import machinery on
+        # behalf of the debuggee and must never be traced.
         skip_calls = (ModuleFinder.__call__.__code__,
-                      ModuleFinder.find_module.__code__)
+                      ModuleFinder.find_module.__code__,
+                      ModuleFinder.find_spec.__code__)
         BdbTracer.__init__(self, not _casesensitive_fs, skip_modules, skip_calls)
         self.lineno_cache = IntegersCache(self.linenumbers)
 
@@ -6,17 +6,9 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
-try:
-    from test import support    # Python 3
-except ImportError:
-    from test import test_support as support    # Python 2
 
 import sys
 import os
-import doctest
-import importlib
-import shutil
-from unittest import defaultTestLoader
 
 from lib.pdb_clone import __version__, PY3
 
@@ -42,6 +34,14 @@ if not PY3:
             except (CCompilerError, DistutilsError, CompileError):
                 self.warn('\n\n*** Building the extension failed. ***')
 
+def _link_or_copy(src, dst):
+    # Hard link the test files, the tests do not modify them.
+    try:
+        os.link(src, dst)
+    except OSError:
+        import shutil
+        shutil.copy2(src, dst)
+
 class Test(Command):
     description = 'run the test suite'
 
@@ -67,12 +67,23 @@ class Test(Command):
         self.tests = (['test_' + t for t in self.tests.split(',') if t] or
             [t[:-3] for t in os.listdir(self.testdir) if
                 t.startswith('test_') and t.endswith('.py')])
-        defaultTestLoader.testMethodPrefix = self.prefix
-        support.failfast = self.stop
-        support.verbose = self.detail
 
     def run (self):
         """Run the test suite."""
+        # The modules used only by the test command are imported here.
+        try:
+            from test import support    # Python 3
+        except ImportError:
+            from test import test_support as support    # Python 2
+        import compileall
+        import doctest
+        import importlib
+        import shutil
+        from unittest import defaultTestLoader
+
+        defaultTestLoader.testMethodPrefix = self.prefix
+        support.failfast = self.stop
+        support.verbose = self.detail
         result_tmplt = '{} ... {:d} tests with zero failures'
         optionflags = doctest.REPORT_ONLY_FIRST_FAILURE if self.stop else 0
         cnt = ok = 0
@@ -82,16 +93,28 @@ class Test(Command):
         sys.path.pop(0)
         import pdb_clone
 
+        # Compile the selected test modules once, the byte code files are
+        # copied (or linked) with the testsuite directory for each test. Note
+        # that the byte code files are written to the source testsuite
+        # directory.
+        for name in ['__init__'] + self.tests:
+            compileall.compile_file(os.path.join(self.testdir, name + '.py'),
+                                    quiet=1)
         for test in self.tests:
             cnt += 1
             with support.temp_cwd() as cwd:
-                sys.path.insert(0, os.getcwd())
+                sys.path.insert(0, cwd)
                 try:
                     savedcwd = support.SAVEDCWD
-                    shutil.copytree(os.path.join(savedcwd, 'testsuite'),
-                                             os.path.join(cwd, 'testsuite'))
+                    if PY3:
+                        shutil.copytree(os.path.join(savedcwd, 'testsuite'),
+                                        os.path.join(cwd, 'testsuite'),
+                                        copy_function=_link_or_copy)
+                    else:
+                        shutil.copytree(os.path.join(savedcwd, 'testsuite'),
+                                        os.path.join(cwd, 'testsuite'))
                     # Some unittest tests spawn pdb-clone.
-                    shutil.copyfile(os.path.join(savedcwd, 'pdb-clone'),
+                    _link_or_copy(os.path.join(savedcwd, 'pdb-clone'),
                                             os.path.join(cwd, 'pdb-clone'))
                     abstest = self.testdir + '.' + test
                     module = importlib.import_module(abstest)
@@ -491,6 +491,46 @@ class RunCallTestCase(SetMethodTestCase):
         ]
         self.runcall(dbg_module)
 
+    def test_step_into_import(self):
+        # Check that stepping into an import never stops in the ModuleFinder
+        # methods invoked by the import machinery.
+        self.create_module("""
+            lno = 2
+        """)
+
+        class StepRecorder(bdb.Bdb):
+            def __init__(self):
+                bdb.Bdb.__init__(self)
+                self.events = []
+
+            def record(self, frame):
+                self.events.append((bdb.canonic(frame.f_code.co_filename),
+                                    frame.f_code.co_name))
+                self.set_step()
+
+            def user_call(self, frame, argument_list):
+                if self.stop_here(frame):
+                    self.record(frame)
+
+            def user_line(self, frame, breakpoint_hits=None):
+                self.record(frame)
+
+            def user_return(self, frame, return_value):
+                self.record(frame)
+
+            def user_exception(self, frame, exc_info):
+                self.record(frame)
+
+        bdb_inst = StepRecorder()
+        bdb_inst.restart()
+        bdb_inst.runcall(dbg_module)
+        self.assertIn((bdb.canonic(TEST_MODULE), '<module>'), bdb_inst.events)
+        bdb_file = bdb.canonic(bdb.__file__)
+        if bdb_file[-4:] in ('.pyc', '.pyo'):
+            bdb_file = bdb_file[:-1]
+        self.assertNotIn((bdb_file, 'find_spec'), bdb_inst.events)
+        self.assertNotIn((bdb_file, 'find_module'), bdb_inst.events)
+
     def test_next(self):
         self.send_expect = [
             STEP, ('line', 2, 'dbg_foobar'),
@@ -18,8 +18,9 @@ except ImportError:
 # A test suite for pdb; not very comprehensive at the moment.
 import sys
 import io
+import re
 import time
-import imp
+import types
 import unittest
 import subprocess
 import textwrap
@@ -36,6 +37,12 @@ from test.test_doctest import _FakeInput
 from pdb_clone import PY3, PY33, DFLT_ADDRESS, pdb
 from pdb_clone import attach as pdb_attach
 
+_has_invalidate_caches = hasattr(importlib, 'invalidate_caches')
+
+# The tests do not rely on closing the inherited file descriptors and spawn
+# their processes with close_fds=False: on Python 3 the default close_fds=True
+# prevents subprocess from using posix_spawn() (Python 3.8+).
+
 class PdbTestInput(object):
     """Context manager that makes testing Pdb in doctests easier."""
 
@@ -45,10 +52,14 @@ class PdbTestInput(object):
     def __enter__(self):
         self.real_stdin = sys.stdin
         sys.stdin = _FakeInput(self.input)
+        self.orig_trace = sys.gettrace()
 
     def __exit__(self, *exc):
         sys.stdin = self.real_stdin
-        sys.settrace(None)
+        # Restore the trace function that was set on entry (None when not
+        # run under a tracer) only when pdb has left another one in place.
+        if sys.gettrace() is not self.orig_trace:
+            sys.settrace(self.orig_trace)
 
 
 def test_pdb_displayhook():
@@ -491,7 +502,7 @@ def test_pdb_skip_modules():
 
 
 # Module for testing skipping of module that makes a callback
-mod = imp.new_module('module_to_skip')
+mod = types.ModuleType('module_to_skip')
 exec('def foo_pony(callback): x = 1; callback(); return None', mod.__dict__)
 
 
@@ -1144,26 +1155,38 @@ def test_pdb_issue_11():
     (Pdb) continue
     """
 
-def normalize(result, filename='', strip_bp_lnum=False):
-    """Normalize a test result."""
+# The pdb prompts at the start of a line of a test result.
+_prompts_re = re.compile(r'(?:\(Pdb\) |\(com\) )+')
+_whitespace_re = re.compile(r'\s+')
+
+def normalize(result, filename='', strip_bp_lnum=False, filenames=()):
+    """Normalize a test result.
+
+    'filenames' is a list of (filename, strip_bp_lnum) pairs applied in order.
+    """
+    filenames = list(filenames)
+    if filename:
+        filenames.insert(0, (filename, strip_bp_lnum))
     lines = []
     for line in result.splitlines():
-        while line.startswith('(Pdb) ') or line.startswith('(com) '):
-            line = line[6:]
+        match = _prompts_re.match(line)
+        if match:
+            line = line[match.end():]
+        if not filenames:
+            # Replace tabs with spaces
+            lines.append(_whitespace_re.sub(' ', line).strip())
+            continue
         words = line.split()
         line = []
-        # Replace tabs with spaces
         for word in words:
-            if filename:
-                idx = word.find(filename)
+            for fname, strip in filenames:
                 # Remove the filename prefix
-                if idx > 0:
-                    word = word[idx:]
-                if idx >=0 and strip_bp_lnum:
-                    idx = word.find(':')
-                    # Remove the ':' separator and breakpoint line number
-                    if idx > 0:
-                        word = word[:idx]
+                _, sep, tail = word.partition(fname)
+                if sep:
+                    if strip:
+                        # Remove the ':' separator and breakpoint line number
+                        tail = tail.partition(':')[0]
+                    word = fname + tail
             line.append(word)
         line = ' '.join(line)
         lines.append(line.strip())
@@ -1180,7 +1203,8 @@ class PdbTestCase(unittest.TestCase):
         cmd = [sys.executable, 'pdb-clone', filename]
         proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
                                    stdin=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
+                                   stderr=subprocess.PIPE,
+                                   close_fds=False)
         stdout, stderr = proc.communicate(str.encode(commands))
         stdout = stdout and bytes.decode(stdout)
         stderr = stderr and bytes.decode(stderr)
@@ -1225,6 +1249,7 @@ class PdbTestCase(unittest.TestCase):
             stdout=subprocess.PIPE,
             stdin=subprocess.PIPE,
             stderr=subprocess.STDOUT,
+            close_fds=False,
             )
         self.addCleanup(proc.stdout.close)
         stdout, stderr = proc.communicate(b'quit\n')
@@ -1261,7 +1286,7 @@ class PdbTestCase(unittest.TestCase):
         """
         with open('bar.py', 'w') as f:
             f.write(textwrap.dedent(bar))
-        if hasattr(importlib, 'invalidate_caches'):
+        if _has_invalidate_caches:
             importlib.invalidate_caches()
         self.addCleanup(support.unlink, 'bar.py')
         stdout, stderr = self.run_pdb(script, commands, 'main.py')
@@ -1370,8 +1395,8 @@ class PdbTestCase(unittest.TestCase):
             '''
         filename = 'main.py'
         stdout, stderr = self.run_pdb(script, commands, filename)
-        stdout = normalize(normalize(
-                    stdout, 'handlers.py', strip_bp_lnum=True), filename)
+        stdout = normalize(stdout, filenames=[('handlers.py', True),
+                                              (filename, False)])
         expected = normalize(expected, 'handlers.py', strip_bp_lnum=True)
         expected = expected.strip()
         self.assertTrue(expected in stdout,
@@ -1431,7 +1456,8 @@ class PdbTestCase(unittest.TestCase):
         cmd = [sys.executable, filename]
         proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
                                    stdin=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
+                                   stderr=subprocess.PIPE,
+                                   close_fds=False)
         stdout, stderr = proc.communicate(str.encode(commands))
         stderr = stderr and normalize(bytes.decode(stderr))
         error = normalize(error)
@@ -1440,13 +1466,11 @@ class PdbTestCase(unittest.TestCase):
             'The debugger is still active while the interpreter shuts down.'
             .format(error, stderr))
 
+    @unittest.skipIf(threading is None, 'python built without threads')
     def test_issue13120(self):
         # invoking "continue" on a non-main thread triggered an exception
         # inside signal.signal
 
-        # raises SkipTest if python was built without threads
-        support.import_module('threading')
-
         with open(support.TESTFN, 'wb') as f:
             f.write(textwrap.dedent("""
                 import threading
@@ -1464,6 +1488,7 @@ class PdbTestCase(unittest.TestCase):
             stdout=subprocess.PIPE,
             stdin=subprocess.PIPE,
             stderr=subprocess.STDOUT,
+            close_fds=False,
             )
         self.addCleanup(proc.stdout.close)
         stdout, stderr = proc.communicate(b'cont\n')
@@ -1490,8 +1515,8 @@ class PdbTestCase(unittest.TestCase):
             """
         filename = 'main.py'
         stdout, stderr = self.run_pdb(script, commands, filename)
-        stdout = normalize(normalize(
-                    stdout, 'asyncore.py', strip_bp_lnum=True), filename)
+        stdout = normalize(stdout, filenames=[('asyncore.py', True),
+                                              (filename, False)])
         expected = normalize(expected).strip()
         self.assertTrue(expected in stdout,
             '\n\nExpected:\n{}\nGot:\n{}\n'
@@ -1636,7 +1661,7 @@ class RemoteDebugging(unittest.TestCase):
         """Run 'source' in a spawned process."""
         cmd_line = [sys.executable, '-c', source]
         self.proc = subprocess.Popen(cmd_line, stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE)
+                                     stderr=subprocess.PIPE, close_fds=False)
         try:
             attach_stdout = io.StringIO() if PY3 else StringIO.StringIO()
             self.attach(commands, attach_stdout)
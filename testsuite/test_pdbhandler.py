@@ -23,6 +23,26 @@ import errno
 from pdb_clone import PY3, DFLT_ADDRESS
 from pdb_clone import attach as pdb_attach
 
+# The header of the source run by the process.
+header_tmplt = """if 1:
+    import sys
+    from pdb_clone import pdbhandler
+    pdbhandler.register('%s', %d, %d)
+    started = False
+"""
+
+# The source of the process that loops until 'i' is set to zero by pdb.
+loop_source = """if 1:
+    import time
+    i = 1
+    while i:
+        if not started:
+            print('started.')
+            sys.stdout.flush()
+            started = True
+        time.sleep(.020)
+    """
+
 class RemoteDebugging(unittest.TestCase):
     """Remote debugging support."""
 
@@ -56,15 +76,12 @@ class RemoteDebugging(unittest.TestCase):
 
     def run_pdb_remotely(self, source, commands, next_commands=None):
         """Run 'source' in a spawned process."""
-        header = ("""if 1:
-            import sys
-            from pdb_clone import pdbhandler
-            pdbhandler.register('%s', %d, %d)
-            started = False""" %
-                (self.address[0], self.address[1], self.signum))
-        cmd_line = [sys.executable, '-c', header + '\n' + source]
+        header = header_tmplt % (self.address[0], self.address[1],
+                                 self.signum)
+        cmd_line = [sys.executable, '-c', header + source]
+        # See the close_fds comment at the top of test_pdb.
         self.proc = subprocess.Popen(cmd_line, stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE)
+                                     stderr=subprocess.PIPE, close_fds=False)
         try:
             attach_stdout = io.StringIO() if PY3 else StringIO.StringIO()
             self.attach(commands, attach_stdout)
@@ -82,16 +99,7 @@ class PdbHandlerTestCase(RemoteDebugging):
     """Remote debugging test cases."""
     def test_register(self):
         # Check pdbhandler.register.
-        stdout = self.run_pdb_remotely("""if 1:
-            import time
-            i = 1
-            while i:
-                if not started:
-                    print('started.')
-                    sys.stdout.flush()
-                    started = True
-                time.sleep(.020)
-            """,
+        stdout = self.run_pdb_remotely(loop_source,
             [
                 'i = 0',
                 'detach',
@@ -131,16 +139,7 @@ class PdbHandlerTestCase(RemoteDebugging):
 
     def test_get_handler(self):
         # Check pdbhandler.get_handler.
-        stdout = self.run_pdb_remotely("""if 1:
-            import time
-            i = 1
-            while i:
-                if not started:
-                    print('started.')
-                    sys.stdout.flush()
-                    started = True
-                time.sleep(.020)
-            """,
+        stdout = self.run_pdb_remotely(loop_source,
             [
                 'from pdb_clone import pdbhandler',
                 'pdbhandler.get_handler()',
@@ -154,16 +153,7 @@ class PdbHandlerTestCase(RemoteDebugging):
 
     def test_unregister(self):
         # Check pdbhandler.unregister.
-        stdout = self.run_pdb_remotely("""if 1:
-            import time
-            i = 1
-            while i:
-                if not started:
-                    print('started.')
-                    sys.stdout.flush()
-                    started = True
-                time.sleep(.020)
-            """,
+        stdout = self.run_pdb_remotely(loop_source,
             [
                 'from pdb_clone import pdbhandler',
                 'pdbhandler.unregister()',
@@ -178,16 +168,7 @@ class PdbHandlerTestCase(RemoteDebugging):
         # Check pdbhandler.register non default arguments.
         self.signum = signal.SIGUSR2
         self.address = ('localhost', 6825)
-        stdout = self.run_pdb_remotely("""if 1:
-            import time
-            i = 1
-            while i:
-                if not started:
-                    print('started.')
-                    sys.stdout.flush()
-                    started = True
-                time.sleep(.020)
-            """,
+        stdout = self.run_pdb_remotely(loop_source,
             [
                 'from pdb_clone import pdbhandler',
                 'pdbhandler.get_handler()',